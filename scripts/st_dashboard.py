@@ -1,53 +1,93 @@
-import altair as alt
 import os
 import pandas as pd
 import streamlit as st
 import sys
 
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
+from datetime import date, timedelta
 from dotenv import load_dotenv
-from plaid.api_client import ApiClient
 from plaid.exceptions import ApiException
 from pathlib import Path
 from traceback import format_exc
+from typing import Tuple
 from urllib.error import URLError
 
-sys.path.append(os.getcwd())
-load_dotenv()
+# Streamlit re-executes this script on every interaction, so only bootstrap once per session
+st.set_page_config(initial_sidebar_state="collapsed")
+if "_bootstrapped" not in st.session_state:
+    sys.path.append(os.getcwd())
+    load_dotenv()
+    st.session_state["_bootstrapped"] = True
 
 from src.budget import Budget
+from src.dashboard_utils import df_for_certain_categories, sorted_unique, write_df
+from src.history import load_history, merge_history, save_history
 from src.transactions import get_transactions_df
 from src.user_modifications import transform_pipeline
+from src.utils import config_version
 from src.views import top_vendors
 
-EXISTING_TRANSACTIONS_FILE = f"{Path.home()}/.ry-n-shres-budget-app/all_transactions.csv"
-TRANSACTION_GRACE_BUFFER = relativedelta(days=10)  # How far before latest transaction to pull from
-
-
-@st.cache(
-    hash_funcs={ApiClient: lambda *args, **kwargs: 0}
-)
+APP_DIR = f"{Path.home()}/.ry-n-shres-budget-app"
+EXISTING_TRANSACTIONS_FILE = f"{APP_DIR}/all_transactions.parquet"
+LEGACY_TRANSACTIONS_FILE = f"{APP_DIR}/all_transactions.csv"  # Read once to migrate to parquet
+TRANSACTION_GRACE_BUFFER = timedelta(days=10)  # How far before latest transaction to pull from
+
+# Low cardinality columns that get filtered / grouped on every rerun
+# category_1 & category_2 are already categorical coming out of transform_pipeline
+CATEGORICAL_COLS = ['name', 'merchant_name', 'week', 'month', 'year']
+# Only columns the Budget summaries use, so it isn't handed (and hashing) the full frame
+BUDGET_COLS = ['date', 'amount', 'category_1', 'week', 'month', 'year']
+BUDGET_CACHE_ENTRIES = 16  # How many filtered versions of the Budget to keep cached
+LARGEST_TRANSACTIONS_LIMIT = 50  # How many rows to show in the "Largest Transactions" table
+
+# Vega-Lite specs for the spending charts. These are plain dicts (rather than alt.Chart objects)
+# so that we skip rebuilding and validating the chart through Altair on every rerun
+BUDGET_BAR_LAYER = {
+    "mark": {"type": "bar"},
+    "encoding": {
+        "y": {"field": "category", "type": "nominal"},
+        "x": {"field": "spent", "type": "quantitative"},
+        "tooltip": {"field": "spent", "type": "quantitative"},
+    },
+}
+BUDGET_LIMIT_TICK_LAYER = {
+    "mark": {"type": "tick", "color": "red", "thickness": 3, "size": 60 * 0.9},
+    "encoding": {
+        "y": {"field": "category", "type": "nominal"},
+        "x": {"field": "total_budget", "type": "quantitative"},
+        "tooltip": {"field": "total_budget", "type": "quantitative"},
+    },
+}
+BUDGET_PROJECTED_TICK_LAYER = {
+    "mark": {"type": "tick", "color": "white", "thickness": 2, "size": 60 * 0.9},
+    "encoding": {
+        "y": {"field": "category", "type": "nominal"},
+        "x": {"field": "projected_budget", "type": "quantitative"},
+    },
+}
+CATEGORY_SPENDING_SPEC = {
+    "mark": {"type": "bar"},
+    "height": {"step": 40},
+    "encoding": {
+        "x": {"field": "amount", "type": "quantitative", "title": "Spent"},
+        "y": {"field": "category_1", "type": "nominal", "title": "Category"},
+        "tooltip": {"field": "amount", "type": "quantitative"},
+    },
+}
+
+
+@st.cache_data(ttl=timedelta(hours=1), show_spinner=False)
 def get_transaction_data():
-    try:
-        existing_df = pd.read_csv(EXISTING_TRANSACTIONS_FILE)
-        existing_df['date'] = existing_df['date'].astype(str)
-    except FileNotFoundError:
-        existing_df = None
+    existing_df = load_history(EXISTING_TRANSACTIONS_FILE, LEGACY_TRANSACTIONS_FILE)
 
     # Get Plaid output
-    now = datetime.now().strftime('%Y-%m-%d')
+    now = date.today().isoformat()
 
     if existing_df is not None:
-        latest_date = existing_df['date'].max()
-        start_date = (datetime.strptime(latest_date, '%Y-%m-%d') - TRANSACTION_GRACE_BUFFER).strftime('%Y-%m-%d')
-        latest_transactions_df = get_transactions_df(start_date, now)
-        latest_transactions_df['date'] = latest_transactions_df['date'].astype(str)
+        start_date = existing_df['date'].max() - TRANSACTION_GRACE_BUFFER
+        latest_transactions_df = get_transactions_df(start_date.strftime('%Y-%m-%d'), now)
+        latest_transactions_df['date'] = pd.to_datetime(latest_transactions_df['date'])
 
-        all_transactions_df = pd.concat([
-            existing_df[existing_df['date'] < start_date],
-            latest_transactions_df
-        ])
+        all_transactions_df = merge_history(existing_df, latest_transactions_df, start_date)
 
     else:
         all_transactions_df = get_transactions_df(
@@ -55,27 +95,46 @@ def get_transaction_data():
             now
         )
 
-    os.makedirs(EXISTING_TRANSACTIONS_FILE[:EXISTING_TRANSACTIONS_FILE.rfind("/")], exist_ok=True)
-    all_transactions_df.to_csv(EXISTING_TRANSACTIONS_FILE, index=False)
+    all_transactions_df = save_history(all_transactions_df, EXISTING_TRANSACTIONS_FILE)
 
-    # Fix for Streamlit Cache issues
-    all_transactions_df = all_transactions_df.drop(
-        ['payment_meta', 'location'],
-        axis=1
-    )
-    all_transactions_df['category'] = all_transactions_df['category'].astype(str)
+    # The transformations & views work with ISO date strings
+    all_transactions_df['date'] = all_transactions_df['date'].dt.strftime('%Y-%m-%d')
 
     return all_transactions_df
 
 
-def write_df(df: pd.DataFrame):
-    """Helper function to st.write a DF with amount stylized to dollars"""
-    st.dataframe(
-        df.style.format({
-            col_name: "{:,.2f}"
-            for col_name in ["amount", "Total Spent"]
-        })
-    )
+@st.cache_data(ttl=timedelta(hours=1), show_spinner=False)
+def _read_existing_transactions() -> pd.DataFrame:
+    """Cached read of the saved transactions, used when Plaid is unavailable"""
+    existing_df = load_history(EXISTING_TRANSACTIONS_FILE, LEGACY_TRANSACTIONS_FILE)
+    if existing_df is None:
+        raise FileNotFoundError(EXISTING_TRANSACTIONS_FILE)
+
+    existing_df['date'] = existing_df['date'].dt.strftime('%Y-%m-%d')
+    return existing_df
+
+
+@st.cache_data(show_spinner=False)
+def _cached_transform(df: pd.DataFrame, config_mtime: float) -> pd.DataFrame:
+    """Runs the user transformation pipeline once per version of the transactions data (and config.json)"""
+    # Sorted by date so that date ranges can be selected with a binary search
+    df = transform_pipeline(df).sort_values('date', kind='stable').reset_index(drop=True)
+
+    # Vectorized date increment columns (parsed once, instead of a strptime per row)
+    dates = pd.to_datetime(df['date'], format='%Y-%m-%d', cache=True)
+    df['week'] = dates.dt.strftime('%G-%V')
+    df['month'] = dates.dt.strftime('%Y-%m')
+    df['year'] = dates.dt.strftime('%Y')
+
+    # Cent precision is all we need, and float32 halves the bytes cached / sent to the browser
+    df['amount'] = df['amount'].round(2).astype('float32')
+
+    for col in CATEGORICAL_COLS:
+        if col in df:
+            df[col] = df[col].astype('category')
+
+    return df
+
 
 # TODO: Make non-budgeted columns show up on bar chart, just without ticks
 # TODO: Make all-time a budget period option (figure out what to do about this - maybe it only shows up for one month?)
@@ -83,13 +142,41 @@ def write_df(df: pd.DataFrame):
 # TODO: Fix the duplicate charge issue with pending charges
 
 
-def single_inc_spending_summary(df: pd.DataFrame, date_inc_key: str, curr_date: str, is_current: bool = False) -> None:
+# Every filter combination is its own entry, so bound how many Budgets (and their frames) are kept around
+@st.cache_resource(max_entries=BUDGET_CACHE_ENTRIES, ttl=timedelta(hours=1), show_spinner=False)
+def _get_budget(df: pd.DataFrame, config_mtime: float) -> Budget:
+    """Builds the Budget once per version of the (filtered) transactions data (and config.json)"""
+    return Budget(df)
+
+
+# Keyed on the same frame as _get_budget (hashed by content), so a summary is never reused for other data
+@st.cache_data(ttl=timedelta(hours=1), show_spinner=False)
+def _budget_summary(
+        budget_df: pd.DataFrame,
+        config_mtime: float,
+        date_inc_key: str,
+        curr_date: str
+) -> Tuple[float, pd.DataFrame]:
+    """The total limit and per category summary for a single date increment"""
+    budget = _get_budget(budget_df, config_mtime)
+    return budget.total_limit(date_inc_key), budget.simple_summary(date_inc_key, curr_date)
+
+
+def single_inc_spending_summary(
+        curr_df: pd.DataFrame,
+        budget_df: pd.DataFrame,
+        date_inc_key: str,
+        curr_date: str,
+        is_current: bool = False
+) -> None:
     """Creates display for a single date increment
 
     Parameters
     ----------
-    df
-        Transactions Dataframe
+    curr_df
+        Transactions Dataframe, already sliced to the selected date increment
+    budget_df
+        The full (filtered) transactions, projected to the columns the Budget uses
     date_inc_key
         The key for date increment (one of week, month, year)
     curr_date
@@ -97,108 +184,64 @@ def single_inc_spending_summary(df: pd.DataFrame, date_inc_key: str, curr_date:
     is_current
         Whether the date represents the most recent date increment
     """
-    budget = Budget(df)
-    curr_df = df[df[date_inc_key] == curr_date]
     total_spending_str = f"{curr_df['amount'].sum():,.2f}"
+    # Budgets are keyed on config.json's modification time too, so budget edits show up on the next rerun
+    config_mtime = config_version()
+    budget = _get_budget(budget_df, config_mtime)
 
     if budget.budget_plan:
         show_budget = st.checkbox("Budget View", value=True)
-        total_budget = budget.total_limit(date_inc_key)
 
     if budget.budget_plan and show_budget:
+        total_budget, simple_summary = _budget_summary(budget_df, config_mtime, date_inc_key, curr_date)
         metric_col1, metric_col2 = st.columns(2)
         with metric_col1:
             st.metric(f"Total Spending", total_spending_str)
         with metric_col2:
             st.metric(f"Total Budget", f"{total_budget:,.2f}")
 
-        simple_summary = budget.simple_summary(date_inc_key, curr_date)
-        bar = alt.Chart(simple_summary).mark_bar().encode(
-            y="category",
-            x="spent",
-            tooltip=alt.Tooltip(field="spent", aggregate="sum", type="quantitative"),
-        ).properties(
-            height=alt.Step(60)
-        )
-
-        ticks = alt.Chart(simple_summary).mark_tick(
-            color="red",
-            thickness=3,
-            size=60 * 0.9,
-        ).encode(
-            y="category",
-            x="total_budget",
-            tooltip=alt.Tooltip(field="total_budget", aggregate="sum", type="quantitative")
-        )
-
+        layers = [BUDGET_BAR_LAYER, BUDGET_LIMIT_TICK_LAYER]
         if is_current:
-            ticks += alt.Chart(simple_summary).mark_tick(
-                color="white",
-                thickness=2,
-                size=60 * 0.9,
-            ).encode(
-                y="category",
-                x="projected_budget",
-            )
+            layers.append(BUDGET_PROJECTED_TICK_LAYER)
 
-        st.altair_chart(bar + ticks, use_container_width=True)
+        st.vega_lite_chart(
+            simple_summary,
+            {"height": {"step": 60}, "layer": layers},
+            use_container_width=True
+        )
 
     else:
         st.metric(f"Total Spending", total_spending_str)
 
-        chart = alt.Chart(curr_df).mark_bar().encode(
-            x=alt.X("sum(amount)", axis=alt.Axis(title='Spent')),
-            y=alt.Y("category_1", axis=alt.Axis(title="Category")),
-            tooltip=alt.Tooltip(field="amount", aggregate="sum", type="quantitative"),
-        ).properties(
-            height=alt.Step(40),
-        )
-
-        st.altair_chart(chart, use_container_width=True)
+        # Aggregating here so the chart only gets one row per category
+        category_spending = curr_df.groupby("category_1", observed=True, as_index=False)["amount"].sum()
+        st.vega_lite_chart(category_spending, CATEGORY_SPENDING_SPEC, use_container_width=True)
 
-    with st.expander("Largest Transactions"):
+    with st.expander("Largest Transactions", expanded=False):
         write_df(
-            curr_df[["date", "amount", "name", "category_1", "category_2"]].sort_values(
-                by="amount",
-                ascending=False
+            curr_df[["date", "amount", "name", "category_1", "category_2"]].nlargest(
+                LARGEST_TRANSACTIONS_LIMIT,
+                "amount"
             )
         )
 
 
-def df_for_certain_categories(df: pd.DataFrame) -> pd.DataFrame:
-    """Helper function to get a DF filtered by any user selected categories"""
-    categories = st.multiselect(
-        f"Select any categories to only see spending for",
-        options=sorted(df['category_1'].unique()),
-        default=[],
-    )
-
-    if len(categories) > 0:
-        bool_key = df['category_1'] == 'NOT_A CATEGORY'
-        for cat in categories:
-            bool_key = bool_key | (df['category_1'] == cat)
-        df = df[bool_key]
-
-    return df
-
-
 def main():
     try:
-        st.set_page_config(initial_sidebar_state="collapsed")
-
         try:
-            df = get_transaction_data().copy()
+            df = get_transaction_data()
         except ApiException as e:
             # TODO: Check e for if it is item expiration
             st.write("Error accessing Plaid - using old transaction data for now")
             st.error(f"{e}")
             try:
-                df = pd.read_csv(EXISTING_TRANSACTIONS_FILE)
+                df = _read_existing_transactions()
             except FileNotFoundError:
                 st.write("Could not find existing transactions file - cannot run this app")
                 raise e
 
-        df = transform_pipeline(df)
+        # Keyed on config.json's modification time too, so edits to it apply on the next rerun
+        df = _cached_transform(df, config_version())
 
         # Organizing Page
         st.write("# Budget Display")
@@ -212,59 +255,64 @@ def main():
 
         categories_to_ignore = st.sidebar.multiselect(
             "Any categories to ignore in calculations",
-            options=sorted(df["category_1"].unique()),
+            options=sorted_unique(df["category_1"]),
             default=["Income"]
         )
+        transaction_dates = sorted_unique(df["date"])
         start_date = st.sidebar.select_slider(
             f"Enter a Start Date for viewing your spending",
-            sorted(df["date"].unique())
+            transaction_dates
         )
         end_date = st.sidebar.select_slider(
             f"Enter an End Date to view your spending until",
-            sorted(df["date"].unique()),
-            value=df["date"].max()
+            transaction_dates,
+            value=transaction_dates[-1]
         )
 
-        if start_date is not None:
-            df = df[df['date'] >= start_date]
-        if end_date is not None:
-            df = df[df['date'] <= end_date]
-
         # Preprocessing
-        if len(categories_to_ignore):
-            for category in categories_to_ignore:
-                df = df[df['category_1'] != category]
+        start_idx = df['date'].searchsorted(start_date, side='left') if start_date is not None else 0
+        end_idx = df['date'].searchsorted(end_date, side='right') if end_date is not None else len(df)
+        df = df.iloc[start_idx:end_idx]
 
-        df['week'] = df['date'].apply(lambda x: datetime.strptime(x, '%Y-%m-%d').strftime('%Y-%V'))
-        if 'month' not in df:
-            df['month'] = df['date'].apply(lambda x: x[:7])
-        df['year'] = df['date'].apply(lambda x: x[:4])
+        if categories_to_ignore:
+            df = df[~df['category_1'].isin(categories_to_ignore)]
 
         # Data Viz
 
         st.write(f"## Single {date_inc_label} in Spending")
-        available_date_incs = sorted(df[date_inc_key].unique(), reverse=True)
+        date_inc_totals = df.groupby(date_inc_key, observed=True)['amount'].sum().sort_index(ascending=False)
+        available_date_incs = date_inc_totals.index.tolist()
+        date_inc_totals = date_inc_totals.to_dict()
         curr_date = st.selectbox(
             f"Pick a {date_inc_label}",
             options=available_date_incs,
-            format_func=lambda label: f"{label}      ({df[df[date_inc_key] == label]['amount'].sum():,.2f})"
+            format_func=lambda label: f"{label}      ({date_inc_totals[label]:,.2f})"
         )
+        # Comparing the categorical codes directly is a plain integer compare over a numpy array
+        date_inc_col = df[date_inc_key]
+        curr_code = date_inc_col.cat.categories.get_loc(curr_date)
+        curr_df = df[date_inc_col.cat.codes.to_numpy() == curr_code]
         single_inc_spending_summary(
-            df,
+            curr_df,
+            df[BUDGET_COLS],
             date_inc_key,
             curr_date,
-            is_current=curr_date == max(available_date_incs)
+            is_current=curr_date == available_date_incs[0]
         )
 
         st.write(f"## {date_inc_label}ly Spending History")
-        history_df = df_for_certain_categories(df)
-        st.bar_chart(history_df.groupby(date_inc_key).sum("amount").sort_index(ascending=False))
+        history_df = df_for_certain_categories(df[[date_inc_key, 'amount', 'category_1']])
+        st.bar_chart(history_df.groupby(date_inc_key, observed=True).sum("amount").sort_index(ascending=False))
 
         st.write(f"## Most Expensive Single {date_inc} Categories")
-        write_df(top_vendors(df, groupby=[date_inc_key, 'category_1']))
+        write_df(top_vendors(
+            df[[date_inc_key, 'category_1', 'name', 'amount', 'date']],
+            groupby=[date_inc_key, 'category_1']
+        ))
 
         st.write("## All Transactions")
-        write_df(df)
+        with st.expander("All Transactions", expanded=False):
+            write_df(df)
 
         # TODO: Figure out how we want to show the various conflicting budget periods
         #       - Do we want the triple layered bar chart still? (spending / projected / limit)
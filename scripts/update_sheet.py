@@ -3,8 +3,9 @@ import os
 
 sys.path.append(os.getcwd())
 
-from datetime import datetime
+from datetime import date
 
+from src.history import DEDUP_KEY_COLS, dedup_against
 from src.transactions import get_transactions_df
 from src.sheets import BudgetSpreadsheet, df_to_ws
 from src.user_modifications import transform_pipeline
@@ -16,7 +17,7 @@ def _transactions_df_pipeline(latest_date='2016-01-01'):
     :param latest_date:
     :return:
     """
-    now = datetime.now().strftime('%Y-%m-%d')
+    now = date.today().isoformat()
 
     latest_transactions_df = get_transactions_df(latest_date, now)
     latest_transactions_df = transform_pipeline(latest_transactions_df)
@@ -35,22 +36,13 @@ def update_transactions() -> None:
     # Get Plaid output
     latest_transactions_df = _transactions_df_pipeline(latest_date)
 
-    # So that we can set columns
-    latest_transactions_df = latest_transactions_df.copy()
-
     # Make sure to remove any duplicates from the final date on the original
-    def key_col(df):
-        return df['date'] + df['name'] + df['amount'].astype(str)
-
-    last_date_transactions = bsh.transactions_df[bsh.transactions_df['date'] == latest_date].copy()
-    last_date_transactions['key_col'] = key_col(last_date_transactions)
-    latest_transactions_df['key_col'] = key_col(latest_transactions_df)
-
-    latest_transactions_df = latest_transactions_df[
-        ~(latest_transactions_df['key_col'].isin(last_date_transactions['key_col']))
+    last_date_transactions = bsh.transactions_df.loc[
+        bsh.transactions_df['date'] == latest_date,
+        DEDUP_KEY_COLS
     ]
 
-    latest_transactions_df = latest_transactions_df.drop('key_col', axis=1)
+    latest_transactions_df = dedup_against(last_date_transactions, latest_transactions_df)
 
     if len(latest_transactions_df) > 0:
         df_to_ws(
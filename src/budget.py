@@ -1,22 +1,34 @@
+from calendar import monthrange
 from collections import Counter
-from datetime import datetime
+from datetime import date, timedelta
+from functools import lru_cache
 import re
 from typing import Iterator, List, Optional, Tuple, Union
 
-from dateutil.relativedelta import relativedelta
 import pandas as pd
 
 from .utils import get_config
 
 INCREMENT_TO_DAY_MAP = {
+    "day": 1,
+    "week": 7,
     "month": 30.5,
-    "day": 7,
+    "year": 365,
 }
 
 
 def now() -> str:
     """String ISO Timestamp of current date"""
-    return datetime.now().strftime("%Y-%m-%d")
+    return date.today().isoformat()
+
+
+def add_months(start_date: date, months: int) -> date:
+    """Adds months to a date, clamping to the end of the month (same as relativedelta(months=...))"""
+    month_index = start_date.month - 1 + months
+    year = start_date.year + month_index // 12
+    month = month_index % 12 + 1
+
+    return start_date.replace(year=year, month=month, day=min(start_date.day, monthrange(year, month)[1]))
 
 
 class BudgetPeriod:
@@ -54,55 +66,104 @@ class BudgetPeriod:
             self.increment = "month"
             self.unit *= 3
 
+        # How far to step forward for each period, with stdlib date math instead of relativedelta
+        if self.increment in ["month", "year"]:
+            self._step_months = self.unit * (12 if self.increment == "year" else 1)
+            self._step_delta = None
+        elif self.increment in ["week", "day"]:
+            self._step_months = None
+            self._step_delta = timedelta(**{f"{self.increment}s": self.unit})
+        else:
+            raise ValueError(f"Unrecognized Period Format {self.period}")
+
+        # The current bounds and perc_complete only change once a day, so they are cached
+        # (keyed by the date they were computed on)
+        self._bounds_cache = None
+        self._perc_complete_cache = None
+
+    def _current_bounds(self) -> Tuple[str, str]:
+        """The start & end dates of the period we are currently in"""
+        today = now()
+        if self._bounds_cache is None or self._bounds_cache[0] != today:
+            relative_to = date.fromisoformat(self.relative_to)
+            today_date = date.fromisoformat(today)
+
+            # Jump straight to the period containing today, then step back if that overshoots
+            # (the current period is the last one starting strictly before today, same as bounds_iter)
+            if self._step_months is not None:
+                months_since = (today_date.year - relative_to.year) * 12 + today_date.month - relative_to.month
+                n_periods = months_since // self._step_months
+            else:
+                n_periods = (today_date - relative_to).days // self._step_delta.days
+
+            while n_periods > 0 and self._period_start(n_periods) >= today_date:
+                n_periods -= 1
+
+            bounds = (
+                self._period_start(n_periods).isoformat(),
+                self._period_start(n_periods + 1).isoformat(),
+            )
+            self._bounds_cache = (today, bounds)
+
+        return self._bounds_cache[1]
+
     def latest(self) -> str:
         """The last occurrence of this period (i.e. May 1st if period = month and today is May 15th)"""
-        for start_date, _ in self.bounds_iter():
-            pass
-
-        return start_date
+        return self._current_bounds()[0]
 
     def next(self) -> str:
         """The next occurrence of this period (i.e. June 1st if period = month and today is May 15th)"""
-        for _, end_date in self.bounds_iter():
-            pass
-
-        return end_date
+        return self._current_bounds()[1]
 
     def perc_complete(self) -> float:
         """The proportion of time through the current period"""
-        latest_date = datetime.strptime(self.latest(), "%Y-%m-%d")
-        next_date = datetime.strptime(self.next(), "%Y-%m-%d")
+        today = now()
+        if self._perc_complete_cache is None or self._perc_complete_cache[0] != today:
+            latest_date = date.fromisoformat(self.latest())
+            next_date = date.fromisoformat(self.next())
+            perc_complete = (date.fromisoformat(today) - latest_date).days * 1.0 / (next_date - latest_date).days
+
+            self._perc_complete_cache = (today, perc_complete)
 
-        return (datetime.now() - latest_date).days * 1.0 / (next_date - latest_date).days
+        return self._perc_complete_cache[1]
+
+    def _period_start(self, n_periods: int) -> date:
+        """The start date of the nth period since relative_to"""
+        start_date = date.fromisoformat(self.relative_to)
+        if self._step_months is not None:
+            return add_months(start_date, n_periods * self._step_months)
+
+        return start_date + n_periods * self._step_delta
 
     def bounds_iter(self) -> Iterator[Tuple[str, str]]:
         """An iterator that yields start & end date tuples since self.relative_to"""
-        start_date = datetime.strptime(self.relative_to, "%Y-%m-%d")
-        now_date = datetime.strptime(now(), "%Y-%m-%d")
-
-        assert start_date < now_date
-        while start_date < now_date:
-            end_date = start_date + relativedelta(**{
-                # Should only be "month" or "week" at this point
-                f"{self.increment}s": self.unit
-            })
+        now_date = date.fromisoformat(now())
 
-            yield start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
-            start_date = end_date
+        assert self._period_start(0) < now_date
+        n_periods = 0
+        while self._period_start(n_periods) < now_date:
+            yield self._period_start(n_periods).isoformat(), self._period_start(n_periods + 1).isoformat()
+            n_periods += 1
 
     def translation_multiplier(self, other_period: "BudgetPeriod") -> float:
         """Get a multiplier to indicate how to transform this period to reflect the length of another"""
-        # Simple case
-        if other_period.increment == self.increment:
-            return other_period.unit * 1.0 / self.unit
-
-        return (
-            (
-                other_period.unit * INCREMENT_TO_DAY_MAP[other_period.increment]
-            ) * 1.0 / (
-                self.unit * INCREMENT_TO_DAY_MAP[self.increment]
-            )
+        return _translation_multiplier(self.increment, self.unit, other_period.increment, other_period.unit)
+
+
+@lru_cache(maxsize=None)
+def _translation_multiplier(increment: str, unit: int, other_increment: str, other_unit: int) -> float:
+    """Cached at module level (rather than on the method) so BudgetPeriod instances aren't kept alive"""
+    # Simple case
+    if other_increment == increment:
+        return other_unit * 1.0 / unit
+
+    return (
+        (
+            other_unit * INCREMENT_TO_DAY_MAP[other_increment]
+        ) * 1.0 / (
+            unit * INCREMENT_TO_DAY_MAP[increment]
         )
+    )
 
 
 class BudgetItem:
@@ -223,8 +284,17 @@ class BudgetPlan:
         """
         default_period = config.get("period", {}).get("default", "month")
 
+        # Share a single BudgetPeriod per distinct period string, so their cached bounds are shared too
+        periods = {}
+
+        def get_period(period: str) -> BudgetPeriod:
+            if period not in periods:
+                periods[period] = BudgetPeriod(period)
+
+            return periods[period]
+
         if config.get("total"):
-            total_budget_item = TotalBudgetItem(config["total"], default_period)
+            total_budget_item = TotalBudgetItem(config["total"], get_period(default_period))
         else:
             total_budget_item = None
 
@@ -233,7 +303,7 @@ class BudgetPlan:
                 BudgetItem(
                     category,
                     limit,
-                    config.get("period", {}).get(category, default_period)
+                    get_period(config.get("period", {}).get(category, default_period))
                 )
                 for category, limit in config["categories"].items()
             ]
@@ -251,7 +321,12 @@ class BudgetPlan:
 class Budget:
     """A budget set by via config.json with overall and category spending limits"""
     def __init__(self, transactions_df: pd.DataFrame):
-        self.transactions_df = transactions_df.copy()
+        # Budget never mutates transactions_df, so hold a reference rather than copying it
+        self.transactions_df = transactions_df
+        # Parse dates once (kept apart from the caller's frame) so period filters compare timestamps
+        self._dates = pd.to_datetime(transactions_df["date"], cache=True)
+        # Categorical so that grouping by category compares integer codes (no-op if already categorical)
+        self._categories = transactions_df["category_1"].astype("category")
 
         config = get_config()["settings"].get("budget")
 
@@ -262,25 +337,46 @@ class Budget:
 
     def current_summary(self):
         """The breakdown of spending for the current period"""
+        # Periods mostly share the same start date, so only group once per distinct start date
+        spending_by_start_date = {}
+
+        def item_summary(budget_item: BudgetItem) -> dict:
+            start_date = budget_item.period.latest() if budget_item.period is not None else None
+            if start_date not in spending_by_start_date:
+                spending_by_start_date[start_date] = self._spending_since(start_date)
+
+            return self._current_budget_item_summary(budget_item, *spending_by_start_date[start_date])
+
         summary = {
-            category: self._current_budget_item_summary(budget_item)
+            category: item_summary(budget_item)
             for category, budget_item in self.budget_plan.category_budgets.items()
         }
-        summary["overall"] = self._current_budget_item_summary(self.budget_plan.total_budget_item)
+        summary["overall"] = item_summary(self.budget_plan.total_budget_item)
 
         return summary
 
-    def _current_budget_item_summary(self, budget_item: BudgetItem):
-        """TODO"""
-        if budget_item.category == "total":
-            df = self.transactions_df
-        else:
-            df = self.transactions_df[self.transactions_df["category_1"] == budget_item.category]
+    def _spending_since(self, start_date: Optional[str]) -> Tuple[pd.Series, float]:
+        """Spending per category_1 and in total since start_date (or for all time if None)"""
+        amounts = self.transactions_df["amount"]
+        categories = self._categories
+        if start_date is not None:
+            in_period = (self._dates >= pd.Timestamp(start_date)).to_numpy()
+            amounts, categories = amounts[in_period], categories[in_period]
 
-        if budget_item.period is not None:
-            df = df[df["date"] >= budget_item.period.latest()]
+        # The total is summed separately so that uncategorized spending still counts towards it
+        return amounts.groupby(categories, sort=False, observed=True).sum(), amounts.sum()
 
-        spending = df["amount"].sum()
+    def _current_budget_item_summary(
+            self,
+            budget_item: BudgetItem,
+            category_spending: pd.Series,
+            total_spending: float
+    ) -> dict:
+        """Summary of a budget item, given the spending per category and in total over its current period"""
+        if budget_item.category == "total":
+            spending = total_spending
+        else:
+            spending = category_spending.get(budget_item.category, 0.0)
 
         return {
             "category": budget_item.category,
@@ -304,7 +400,9 @@ class Budget:
             A single year, month, or week to drill into
         """
         budget_period = BudgetPeriod(date_inc)
-        curr_df = self.transactions_df[self.transactions_df[date_inc] == period]
+        in_period = (self.transactions_df[date_inc] == period).to_numpy()
+        amounts = self.transactions_df["amount"][in_period]
+        category_spending = amounts.groupby(self._categories[in_period], sort=False, observed=True).sum()
         summary = {
             "category": [],
             "spent": [],
@@ -315,7 +413,7 @@ class Budget:
         for category, cat_budget in self.budget_plan.category_budgets.items():
             limit = cat_budget.period_limit(budget_period)
             projected_limit = budget_period.perc_complete() * limit
-            cat_spending = curr_df[curr_df["category_1"] == category]["amount"].sum()
+            cat_spending = category_spending.get(category, 0.0)
 
             summary["category"].append(category)
             summary["spent"].append(cat_spending)
@@ -325,7 +423,7 @@ class Budget:
         # Including "Other" Category
         other_limit = self.total_limit(date_inc) - sum(summary["total_budget"])
         summary["category"].append("Other")
-        summary["spent"].append(curr_df["amount"].sum() - sum(summary["spent"]))
+        summary["spent"].append(amounts.sum() - sum(summary["spent"]))
         summary["total_budget"].append(other_limit)
         summary["projected_budget"].append(budget_period.perc_complete() * other_limit)
 
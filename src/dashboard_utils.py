@@ -0,0 +1,43 @@
+"""
+Shared Streamlit helpers for rendering transaction data in the dashboard
+"""
+try:
+    import streamlit as st
+except ImportError:
+    raise RuntimeError("Need to run `pip install -r dashboard_requirements.txt` to use dashboard functionality")
+
+import pandas as pd
+
+
+def write_df(df: pd.DataFrame):
+    """Helper function to st.write a DF with amount stylized to dollars"""
+    # column_config formats client side, instead of building a Styler over every cell
+    # NOTE: The printf style format has no thousands separator, but keeps the columns numeric (and sortable)
+    st.dataframe(
+        df,
+        column_config={
+            col_name: st.column_config.NumberColumn(format="%.2f")
+            for col_name in ["amount", "Total Spent"]
+            if col_name in df.columns
+        }
+    )
+
+
+@st.cache_data(show_spinner=False)
+def sorted_unique(values: pd.Series) -> list:
+    """Sorted unique values of a column, cached so widget reruns don't re-sort them"""
+    return sorted(values.unique().tolist())
+
+
+def df_for_certain_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """Helper function to get a DF filtered by any user selected categories"""
+    categories = st.multiselect(
+        f"Select any categories to only see spending for",
+        options=sorted_unique(df['category_1']),
+        default=[],
+    )
+
+    if categories:
+        df = df[df['category_1'].isin(categories)]
+
+    return df
@@ -0,0 +1,115 @@
+"""
+Helpers for keeping the pulled transaction history (on disk, or in the sheet) up to date
+"""
+import os
+import pandas as pd
+
+from typing import Optional, Sequence
+
+# Stored as datetime64 - Plaid returns datetime.date objects, while the legacy CSV only had strings
+DATE_COLS = ['date', 'authorized_date']
+DEDUP_KEY_COLS = ['date', 'name', 'amount']  # Identifies a transaction already in the history
+# Nested Plaid objects that can't be stored in parquet (or hashed by the Streamlit cache)
+NESTED_COLS = ['payment_meta', 'location']
+
+
+def load_history(history_file: str, legacy_csv_file: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Loads the saved transactions (with `date` as datetime64), or None if there are none yet
+    :param history_file: The parquet file written by save_history
+    :param legacy_csv_file: The CSV the history used to be kept in, read if there is no parquet file yet
+    :return:
+    """
+    if os.path.exists(history_file):
+        df = pd.read_parquet(history_file)
+
+        # Older histories were saved with a float32 amount, so restore the exact cent values
+        if df['amount'].dtype == 'float32':
+            df['amount'] = df['amount'].astype('float64').round(2)
+
+        return df
+
+    if legacy_csv_file is not None and os.path.exists(legacy_csv_file):
+        return pd.read_csv(legacy_csv_file, engine='pyarrow', parse_dates=['date'])
+
+    return None
+
+
+def merge_history(existing_df: pd.DataFrame, latest_df: pd.DataFrame, start_date: pd.Timestamp) -> pd.DataFrame:
+    """
+    Replaces everything in the history from start_date on with the latest pull
+    :param existing_df: The saved history
+    :param latest_df: Transactions pulled since start_date
+    :param start_date:
+    :return:
+    """
+    # The history is saved sorted by date, so only sort if it wasn't (e.g. the legacy CSV)
+    if not existing_df['date'].is_monotonic_increasing:
+        existing_df = existing_df.sort_values('date', kind='stable')
+
+    return pd.concat([
+        existing_df.iloc[:existing_df['date'].searchsorted(start_date)],
+        latest_df
+    ], ignore_index=True)
+
+
+def _normalize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Gives every column a single type that parquet can store
+    (the legacy CSV's strings get concatenated with Plaid's date objects, lists, etc.)
+    """
+    for col in df.columns:
+        if col in DATE_COLS:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+
+        elif df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed'):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    return df
+
+
+def save_history(df: pd.DataFrame, history_file: str) -> pd.DataFrame:
+    """
+    Cleans up and saves the transactions history as parquet
+    :param df: The transactions, with `date` as datetime64 or datetime.date
+    :param history_file:
+    :return: The history as saved (sorted by date)
+    """
+    df = df.drop(NESTED_COLS, axis=1, errors='ignore')
+    df['category'] = df['category'].astype(str)
+    # Kept as float64 - float32 can't represent most cent amounts exactly, which breaks amount rules
+    df['amount'] = pd.to_numeric(df['amount'])
+    df = _normalize_dtypes(df)
+
+    # Saved sorted by date, so the next load can slice it with a binary search straight away
+    df = df.sort_values('date', kind='stable', ignore_index=True)
+
+    os.makedirs(os.path.dirname(history_file), exist_ok=True)
+    df.to_parquet(history_file, compression='zstd', index=False)
+
+    return df
+
+
+def _dedup_keys(df: pd.DataFrame, cols: Sequence[str]) -> pd.MultiIndex:
+    """The key columns of df as a MultiIndex, with any date normalized to an ISO string"""
+    keys = df[list(cols)].copy()
+    if 'date' in keys:
+        # The sheet has ISO strings, while Plaid gives datetime.date objects
+        keys['date'] = pd.to_datetime(keys['date']).dt.strftime('%Y-%m-%d')
+
+    return pd.MultiIndex.from_frame(keys)
+
+
+def dedup_against(
+        existing_df: pd.DataFrame,
+        new_df: pd.DataFrame,
+        cols: Sequence[str] = DEDUP_KEY_COLS
+) -> pd.DataFrame:
+    """
+    Returns the rows of new_df whose key columns don't already appear in existing_df
+    :param existing_df:
+    :param new_df:
+    :param cols: The columns that together identify a transaction
+    :return:
+    """
+    return new_df[~_dedup_keys(new_df, cols).isin(_dedup_keys(existing_df, cols))]
@@ -7,7 +7,9 @@ import re
 import pandas as pd
 import numpy as np
 
-from gspread.utils import a1_to_rowcol, rowcol_to_a1
+from typing import List, Optional
+
+from gspread.utils import a1_to_rowcol
 
 from .views import VIEW_FUNCS
 from .utils import get_config
@@ -15,6 +17,21 @@ from .utils import get_config
 gc = gspread.service_account()
 
 
+def df_to_values(df: pd.DataFrame, include_headers: bool = True) -> List[list]:
+    """
+    Converts the dataframe to the list of rows expected by the sheets API
+    :param df:
+    :param include_headers:
+    :return:
+    """
+    # Missing values (e.g. NaN in categorical columns) have to be sent as empty cells
+    values = df.astype(object).where(df.notna(), None).values.tolist()
+    if include_headers:
+        values = [df.columns.values.tolist()] + values
+
+    return values
+
+
 def df_to_ws(
         worksheet: gspread.Worksheet,
         df: pd.DataFrame,
@@ -28,13 +45,9 @@ def df_to_ws(
     :param start_location:
     :param include_headers:
     """
-    values = df.values.tolist()
-    if include_headers:
-        values = [df.columns.values.tolist()] + values
-
     worksheet.update(
         start_location,
-        values
+        df_to_values(df, include_headers=include_headers)
     )
 
 
@@ -46,22 +59,13 @@ def ws_to_df(worksheet: gspread.Worksheet, start_location: str = 'A1') -> pd.Dat
     :return:
     """
     start_row, start_col = a1_to_rowcol(start_location)
-    last_col_cell = worksheet.findall(
-        re.compile('.*'),
-        in_row=start_row
-    )[-1]
 
-    last_row_cell = worksheet.findall(
-        re.compile('.+'),
-        in_column=start_col
-    )[-1]
+    # A single fetch of the whole (padded) sheet; the table bounds are then found locally
+    data_arr = np.array(worksheet.get_all_values())[start_row - 1:, start_col - 1:]
 
-    last_row = last_row_cell.row
-    last_col = last_col_cell.col
-
-    data_arr = np.array(
-        worksheet.get_values(f'{start_location}:{rowcol_to_a1(last_row, last_col)}')
-    )
+    # The table ends at the last non-empty cell in its first column
+    last_row = (data_arr[:, 0] != '').nonzero()[0].max()
+    data_arr = data_arr[:last_row + 1, :]
 
     return pd.DataFrame(data=data_arr[1:, :], columns=data_arr[0, :])
 
@@ -75,8 +79,10 @@ class BudgetSpreadsheet:
 
         try:
             self.transactions_df = ws_to_df(self.transactions_sheet)
-            self.transactions_df["amount"] = self.transactions_df["amount"].apply(
-                lambda x: x.replace("$", "") if type(x) is str else x
+            # Sheet values come back as formatted strings, e.g. "$1,234.56"
+            self.transactions_df["amount"] = pd.to_numeric(
+                self.transactions_df["amount"].astype(str).str.replace(r"[$,]", "", regex=True),
+                errors="coerce"
             )
         except Exception as e:
             # Print the exception, but proceed
@@ -96,41 +102,36 @@ class BudgetWorksheet:
         self.worksheet = worksheet
         self.transactions_df = transactions_df
 
-    def _template_update_cell(self, cell: gspread.Cell, update_now: bool = True) -> bool:
+    def _template_update_cell(self, cell: gspread.Cell) -> Optional[dict]:
         """
-        Updates a single cell for templating commands
+        Evaluates a single cell for templating commands
         :param cell:
-        :return: Whether the cell should be updated after this method
+        :return: The {"range", "values"} update for this cell, or None if nothing should be written
         """
         # TODO: Figure out if there are any single cell values or expressions we want
-        should_update = False
         expression = cell.value[2:-2]
 
         if expression in VIEW_FUNCS:
             view_df = VIEW_FUNCS[expression](self.transactions_df)
-            df_to_ws(self.worksheet, view_df, start_location=cell.address)
+            return {"range": cell.address, "values": df_to_values(view_df)}
 
         elif expression == 'TESTING':
-            cell.value = 'TESTED!'
-            should_update = True
-
-        if update_now and should_update:
-            self.worksheet.update_cell(cell.row, cell.col, cell.value)
+            return {"range": cell.address, "values": [['TESTED!']]}
 
-        return should_update
+        return None
 
     def template_update(self) -> None:
         """
         Updates the spreadsheet looking for templating commands
         """
-        cells_to_update = []
         reg = re.compile('{{.+}}')
         cells = self.worksheet.findall(reg)
 
-        for cell in cells:
-            if self._template_update_cell(cell, update_now=False):
-                cells_to_update.append(cell)
-
-        self.worksheet.update_cells(cells_to_update)
-
+        # Send every templated range in a single request
+        updates = [
+            update for update in map(self._template_update_cell, cells)
+            if update is not None
+        ]
 
+        if updates:
+            self.worksheet.batch_update(updates)
@@ -6,7 +6,8 @@ For Getting a new access token:
 import pandas as pd
 import plaid
 
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 
 from plaid.api import plaid_api
 from plaid.model.transactions_get_request_options import TransactionsGetRequestOptions
@@ -17,6 +18,10 @@ from .utils import get_config
 
 creds = get_config()
 
+# Plaid's maximum page size for transactions_get
+TRANSACTIONS_PAGE_SIZE = 500
+MAX_CONCURRENT_REQUESTS = 8
+
 
 plaid_config = plaid.Configuration(
     host=plaid.Environment.Development,
@@ -28,30 +33,48 @@ plaid_config = plaid.Configuration(
 client = plaid_api.PlaidApi(plaid.ApiClient(plaid_config))
 
 
-def get_transactions(start_date: str, end_date: str, return_metadata: bool = False):
-    all_transactions = []
+def _get_transactions_page(transaction_args: dict, offset: int):
+    """Request a single page of (up to TRANSACTIONS_PAGE_SIZE) transactions, starting at offset"""
+    request = TransactionsGetRequest(
+        **transaction_args,
+        options=TransactionsGetRequestOptions(count=TRANSACTIONS_PAGE_SIZE, offset=offset)
+    )
+    return client.transactions_get(request)
+
 
+def get_transactions(start_date: str, end_date: str, return_metadata: bool = False):
     transation_args = dict(
         access_token=creds['access_token'],
-        start_date=datetime.strptime(start_date, '%Y-%m-%d').date(),
-        end_date=datetime.strptime(end_date, '%Y-%m-%d').date()
+        start_date=date.fromisoformat(start_date),
+        end_date=date.fromisoformat(end_date)
     )
-    request = TransactionsGetRequest(**transation_args)
-    response = client.transactions_get(request)
+    response = _get_transactions_page(transation_args, 0)
+    total_transactions = response['total_transactions']
+
+    # The total is known after the first page, so fetch the rest concurrently
+    page_offsets = list(range(0, total_transactions, TRANSACTIONS_PAGE_SIZE))
+    pages = [response['transactions']]
+    if len(page_offsets) > 1:
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+            # map yields in offset order, so transactions stay in the order Plaid returns them
+            pages.extend(
+                page['transactions']
+                for page in executor.map(lambda offset: _get_transactions_page(transation_args, offset), page_offsets[1:])
+            )
 
-    all_transactions.extend(response['transactions'])
+    all_transactions = []
+    for offset, page_end, page in zip(page_offsets, page_offsets[1:] + [total_transactions], pages):
+        page = list(page)
 
-    while len(all_transactions) < response['total_transactions']:
-        options = TransactionsGetRequestOptions()
-        options.offset = len(all_transactions)
+        # Plaid may return short pages, so fill in any gap before the next page's offset sequentially
+        while offset + len(page) < page_end:
+            missing_transactions = _get_transactions_page(transation_args, offset + len(page))['transactions']
+            if not missing_transactions:
+                break
 
-        request = TransactionsGetRequest(
-            **transation_args,
-            options=options
-        )
-        response = client.transactions_get(request)
+            page.extend(missing_transactions)
 
-        all_transactions.extend(response['transactions'])
+        all_transactions.extend(page[:page_end - offset])
 
     if return_metadata:
         response['transactions'] = all_transactions
@@ -64,23 +87,8 @@ def get_transactions(start_date: str, end_date: str, return_metadata: bool = Fal
 def get_transactions_df(start_date, end_date):
     all_transactions = get_transactions(start_date, end_date)
 
-    unique_keys = set()
-    for transaction in all_transactions:
-        unique_keys.update(transaction.to_dict().keys())
-
-    trans_data = {
-        key: []
-        for key in unique_keys
-    }
-
-    for transaction in all_transactions:
-        for key in unique_keys:
-            if key in transaction:
-                trans_data[key].append(transaction[key])
-            else:
-                trans_data[key].append(None)
-
-    return pd.DataFrame(trans_data)
+    # Keys missing from a transaction are filled with NaN
+    return pd.DataFrame.from_records([transaction.to_dict() for transaction in all_transactions])
 
 
 # TODO: Figure out how to update the link tokens
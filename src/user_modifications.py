@@ -1,42 +1,86 @@
 """
 This file contains the code for users making modifications to the categories
 """
+import numpy as np
 import pandas as pd
+import re
 
 from ast import literal_eval
-from typing import Union
+from functools import lru_cache
+from typing import List, Optional, Pattern, Tuple, Union
 
 from src.utils import get_config
 
 
-def add_col(df, col_name, apply_func):
-    """Returns a df with an added column based on the apply_func"""
-    df[col_name] = df.apply(apply_func, axis=1)
+def add_col(df, col_name, col_func):
+    """Returns a df with an added column based on the col_func (which computes the whole column from df)"""
+    df[col_name] = col_func(df)
     return df
 
 
+@lru_cache(maxsize=4096)
+def _parse_list_str(val: str) -> list:
+    """
+    Cached literal_eval, since the same few category strings repeat across transactions
+    NOTE: The returned lists are shared, so should not be mutated
+    """
+    return literal_eval(val)
+
+
 def str_or_list_to_list(val: Union[str, list]) -> list:
     """Helper to change a string or list to list"""
     if type(val) is str:
-        return literal_eval(val)
+        return _parse_list_str(val)
     elif type(val) is list:
         return val
     else:
         raise ValueError(f"Unrecognized type: {type(val)} for {val}")
 
 
+def nth_categories(df: pd.DataFrame, n: int) -> pd.Series:
+    """The nth entry of each row's category list (None where there isn't one)"""
+    category_lists = [str_or_list_to_list(val) if val else [] for val in df['category']]
+    return pd.Series(
+        [categories[n] if len(categories) > n else None for categories in category_lists],
+        index=df.index,
+        dtype=object
+    )
+
+
 TRANSFORMATIONS = {
-    'add_month': lambda df: add_col(df, 'month', lambda row: row['date'][:7]),
-    'add_cat_1': lambda df: add_col(df, 'category_1', lambda row: str_or_list_to_list(row['category'])[0] if row['category'] else None),
-    'add_cat_2': lambda df: add_col(df, 'category_2', lambda row: str_or_list_to_list(row['category'])[1] if len(str_or_list_to_list(row['category'])) > 1 else None),
+    'add_month': lambda df: add_col(df, 'month', lambda df: df['date'].astype(str).str.slice(0, 7)),
+    'add_cat_1': lambda df: add_col(df, 'category_1', lambda df: nth_categories(df, 0)),
+    'add_cat_2': lambda df: add_col(df, 'category_2', lambda df: nth_categories(df, 1)),
     'important_cols': lambda df: df[['date', 'month', 'name', 'merchant_name', 'category_1', 'category_2', 'payment_channel', 'amount']],
-    'remove_transfers': lambda df: df[df['name'] != ''],
+    'remove_transfers': lambda df: df[(df['name'] != '').to_numpy()],
 }
 
 
-def _text_search_bool_key(df: pd.DataFrame, term: str) -> pd.Series:
-    """Helper to return a boolean series of if the term is in df['name']"""
-    return df['name'].apply(lambda x: x.find(term) != -1)
+def _text_search_bool_key(df: pd.DataFrame, term: Union[str, Pattern]) -> pd.Series:
+    """Helper to return a boolean series of if the term (or a compiled regex) is in df['name']"""
+    return df['name'].str.contains(term, regex=not isinstance(term, str), na=False)
+
+
+def _any_term_regex(terms: List[str]) -> Pattern:
+    """A single regex matching any of the (literal) terms"""
+    return re.compile('|'.join(map(re.escape, terms)))
+
+
+@lru_cache(maxsize=128)
+def _category_matchers(search_terms: tuple) -> Tuple[Optional[Pattern], Optional[Pattern], tuple]:
+    """
+    Splits a category's search terms into (positive regex, negation regex, amounts)
+    Cached since the pipeline is rerun with the same config
+    """
+    positives = [term for term in search_terms if type(term) is str and term[0] != '!']
+    negations = [term[1:] for term in search_terms if type(term) is str and term[0] == '!']
+    amounts = tuple(term for term in search_terms if type(term) is not str)
+
+    return (
+        _any_term_regex(positives) if positives else None,
+        _any_term_regex(negations) if negations else None,
+        amounts,
+    )
 
 
 def transform_df_by_funcs(df: pd.DataFrame, config: dict) -> pd.DataFrame:
@@ -47,21 +91,44 @@ def transform_df_by_funcs(df: pd.DataFrame, config: dict) -> pd.DataFrame:
     return df
 
 
+def _removed_transactions_mask(df: pd.DataFrame, config: dict) -> np.ndarray:
+    """Boolean array of the transactions containing search terms specified in config"""
+    filter_out_strs = config['settings']['remove_transactions']
+    if not filter_out_strs:
+        return np.zeros(len(df), dtype=bool)
+
+    # A single scan for all of the search terms
+    return _text_search_bool_key(df, _any_term_regex(filter_out_strs)).to_numpy()
+
+
+def _removed_accounts_mask(df: pd.DataFrame, config: dict) -> np.ndarray:
+    """Boolean array of the transactions from account IDs specified in config"""
+    account_ids = config['settings'].get('remove_account_ids', [])
+    if not account_ids:
+        return np.zeros(len(df), dtype=bool)
+
+    return df["account_id"].isin(account_ids).to_numpy()
+
+
+def _take_rows(df: pd.DataFrame, keep: np.ndarray) -> pd.DataFrame:
+    """
+    The rows of df where keep is True, as a new frame
+    take allocates the result once (and it isn't flagged as a copy of df, unlike df[keep])
+    """
+    return df.take(np.flatnonzero(keep))
+
+
 def remove_transactions(df: pd.DataFrame, config: dict) -> pd.DataFrame:
     """Remove transactions that contain search terms specified in config"""
-    for filter_out_str in config['settings']['remove_transactions']:
-        df = df[
-            ~(_text_search_bool_key(df, filter_out_str))
-        ]
-
-    return df
+    return _take_rows(df, ~_removed_transactions_mask(df, config))
 
 
 def remove_accounts(df: pd.DataFrame, config: dict) -> pd.DataFrame:
-    """Remove transactions from specified account IDs"""
-    for account_id in config['settings'].get('remove_account_ids', []):
-        df = df[df["account_id"] != account_id]
-    return df.copy()
+    """Remove transactions from specified account IDs
+
+    NOTE: Always returns a new frame, so later steps can modify it without touching the caller's
+    """
+    return _take_rows(df, ~_removed_accounts_mask(df, config))
 
 
 def update_categories(df: pd.DataFrame, config: dict) -> pd.DataFrame:
@@ -69,24 +136,26 @@ def update_categories(df: pd.DataFrame, config: dict) -> pd.DataFrame:
 
     NOTE: Will raise an error if category_1 does not exist
     """
+    # The transformations can leave df as a slice of another frame, so update our own copy
     df = df.copy()
     for new_category, search_terms in config['settings']['custom_category_map'].items():
-        bool_key = df.apply(lambda row: False, axis=1)
+        bool_key = pd.Series(False, index=df.index)
 
-        # IMPORTANT: Sorting in reverse so that negations show up last
-        for search_term in sorted(search_terms, reverse=True):
-            if type(search_term) is str:
+        positive_regex, negation_regex, amounts = _category_matchers(tuple(search_terms))
 
-                # Negations require an &= to overwrite any non-negation rules
-                if search_term[0] == '!':
-                    bool_key &= ~(_text_search_bool_key(df, search_term[1:]))
+        # One scan of the names for all of the category's terms (and one for all negations)
+        if positive_regex is not None:
+            bool_key |= _text_search_bool_key(df, positive_regex)
 
-                else:
-                    bool_key |= _text_search_bool_key(df, search_term)
+        if amounts:
+            bool_key |= df['amount'].isin(amounts)
 
-            else:
-                bool_key |= df['amount'] == search_term
+        # IMPORTANT: Negations are applied last, with an &= to overwrite any non-negation rules
+        if negation_regex is not None:
+            bool_key &= ~(_text_search_bool_key(df, negation_regex))
 
+        # Indexing with the plain array skips pandas' index alignment
+        bool_key = bool_key.to_numpy()
         df.loc[bool_key, 'category_1'] = new_category
         df.loc[bool_key, 'category_2'] = None
 
@@ -96,13 +165,18 @@ def update_categories(df: pd.DataFrame, config: dict) -> pd.DataFrame:
 def transform_pipeline(df: pd.DataFrame):
     """Runs the full transformation pipeline including all user specifications"""
     config = get_config()
-    # This has to be before transform bc we lose account_id column
-    df = remove_accounts(df, config)
+    # Both row filters only need the raw account_id & name columns, so they are applied together
+    # (and before transform bc we lose account_id column), allocating the kept rows once
+    df = _take_rows(df, ~(_removed_accounts_mask(df, config) | _removed_transactions_mask(df, config)))
     df = transform_df_by_funcs(df, config)
-    df = remove_transactions(df, config)
 
     # Will throw error if we don't have add_cat_1 as a transformation
     if 'category_1' in df:
         df = update_categories(df, config)
 
+    # Low cardinality, so categoricals save memory and make grouping/comparisons on them much cheaper
+    for col in ['category_1', 'category_2']:
+        if col in df:
+            df[col] = df[col].astype('category')
+
     return df
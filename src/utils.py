@@ -1,6 +1,8 @@
 import json
 import os
 
+from functools import lru_cache
+
 ENV_TO_CONFIG_MAP = {
     "PLAID_ACCESS_TOKEN": "access_token",
     "PLAID_ITEM_ID": "item_id",
@@ -10,9 +12,26 @@ ENV_TO_CONFIG_MAP = {
 }
 
 
+CONFIG_PATH = 'config.json'
+
+
+def config_version() -> float:
+    """Modification time of config.json, to key caches on so they are invalidated by config edits"""
+    return os.path.getmtime(CONFIG_PATH)
+
+
 def get_config() -> dict:
-    """Returns the Config based on the default Config path"""
-    with open('config.json') as config_file:
+    """Returns the Config based on the default Config path
+
+    Only re-read when config.json changes, and shared between callers, so treat it as read-only
+    """
+    return _read_config(os.path.abspath(CONFIG_PATH), config_version())
+
+
+@lru_cache(maxsize=1)
+def _read_config(config_path: str, version: float) -> dict:
+    """Reads & parses the config (cached per path and modification time)"""
+    with open(config_path) as config_file:
         config = json.load(config_file)
 
     for env_var_name, config_key in ENV_TO_CONFIG_MAP.items():
@@ -5,16 +5,19 @@ import pandas as pd
 
 def top_vendors(df: pd.DataFrame, groupby: Any = 'name', limit: Optional[int] = None):
     """Return a DataFrame of top vendors"""
-    new_df = df.groupby(groupby).agg(**{
+    new_df = df.groupby(groupby, observed=True).agg(**{
         'Total Spent': ('amount', 'sum'),
         'Total Transactions': ('name', 'count'),
         'Last Transaction': ('date', 'max')
-    }).sort_values('Total Spent', ascending=False).reset_index()
+    })
 
+    # Only a partial sort is needed for the top few
     if limit is not None:
-        new_df = new_df.head(limit)
+        new_df = new_df.nlargest(limit, 'Total Spent')
+    else:
+        new_df = new_df.sort_values('Total Spent', ascending=False)
 
-    return new_df
+    return new_df.reset_index()
 
 
 # Dict of useful groupby/aggregations for creating views on payment data from a DF
@@ -0,0 +1,155 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+import src.budget
+from src.budget import Budget, BudgetPeriod, add_months
+
+
+@pytest.fixture
+def fixed_now(monkeypatch):
+    """Pins the current date used by BudgetPeriod"""
+    monkeypatch.setattr(src.budget, "now", lambda: "2021-05-15")
+
+
+def test_add_months():
+    """Tests that month math rolls over years and clamps to the end of the month"""
+    assert add_months(date(2021, 1, 15), 1) == date(2021, 2, 15)
+    assert add_months(date(2021, 11, 15), 3) == date(2022, 2, 15)
+    assert add_months(date(2021, 1, 31), 1) == date(2021, 2, 28)
+    assert add_months(date(2020, 1, 31), 1) == date(2020, 2, 29)
+    assert add_months(date(2021, 3, 31), 12) == date(2022, 3, 31)
+
+
+def test_bounds_iter(fixed_now):
+    """Tests the periods yielded since relative_to"""
+    period = BudgetPeriod("month", relative_to="2021-01-01")
+    assert list(period.bounds_iter()) == [
+        ("2021-01-01", "2021-02-01"),
+        ("2021-02-01", "2021-03-01"),
+        ("2021-03-01", "2021-04-01"),
+        ("2021-04-01", "2021-05-01"),
+        ("2021-05-01", "2021-06-01"),
+    ]
+
+    period = BudgetPeriod("2_week", relative_to="2021-04-01")
+    assert list(period.bounds_iter()) == [
+        ("2021-04-01", "2021-04-15"),
+        ("2021-04-15", "2021-04-29"),
+        ("2021-04-29", "2021-05-13"),
+        ("2021-05-13", "2021-05-27"),
+    ]
+
+    period = BudgetPeriod("quarter", relative_to="2021-01-01")
+    assert period.latest() == "2021-04-01"
+    assert period.next() == "2021-07-01"
+
+
+def test_perc_complete(fixed_now):
+    """Tests the proportion of the current period that has passed"""
+    assert BudgetPeriod("month", relative_to="2021-01-01").perc_complete() == 14 / 31
+    assert BudgetPeriod("week", relative_to="2021-05-10").perc_complete() == 5 / 7
+
+
+def test_unrecognized_period():
+    """Tests that unusable period strings fail at construction"""
+    with pytest.raises(ValueError):
+        BudgetPeriod("fortnight", relative_to="2021-01-01")
+
+    with pytest.raises(ValueError):
+        BudgetPeriod("2_fortnight", relative_to="2021-01-01")
+
+
+def test_translation_multiplier():
+    """Tests scaling between period lengths, within and across increments"""
+    month = BudgetPeriod("month", relative_to="2021-01-01")
+    assert month.translation_multiplier(BudgetPeriod("3_month", relative_to="2021-01-01")) == 3.0
+    assert month.translation_multiplier(BudgetPeriod("week", relative_to="2021-01-01")) == 7 / 30.5
+    assert BudgetPeriod("week", relative_to="2021-01-01").translation_multiplier(month) == 30.5 / 7
+
+
+def test_current_bounds_match_bounds_iter(monkeypatch):
+    """Tests that the directly computed current period is the last one bounds_iter yields"""
+    for today in ["2021-01-02", "2021-02-28", "2021-03-01", "2021-03-02", "2021-12-31", "2022-01-01"]:
+        monkeypatch.setattr(src.budget, "now", lambda: today)
+        for period in ["week", "2_week", "month", "quarter", "2_month"]:
+            budget_period = BudgetPeriod(period, relative_to="2021-01-01")
+            assert (budget_period.latest(), budget_period.next()) == list(budget_period.bounds_iter())[-1]
+
+
+def test_current_bounds_cached_per_day(monkeypatch):
+    """Tests that the current bounds are reused within a day, and recomputed on the next"""
+    monkeypatch.setattr(src.budget, "now", lambda: "2021-05-15")
+    period = BudgetPeriod("month", relative_to="2021-01-01")
+
+    period_start = period._period_start
+    calls = []
+    monkeypatch.setattr(period, "_period_start", lambda n_periods: calls.append(n_periods) or period_start(n_periods))
+
+    assert (period.latest(), period.next()) == ("2021-05-01", "2021-06-01")
+    n_calls = len(calls)
+    assert n_calls > 0
+
+    assert (period.latest(), period.next()) == ("2021-05-01", "2021-06-01")
+    assert len(calls) == n_calls
+
+    monkeypatch.setattr(src.budget, "now", lambda: "2021-06-02")
+    assert (period.latest(), period.next()) == ("2021-06-01", "2021-07-01")
+    assert len(calls) > n_calls
+
+
+def test_perc_complete_cached_per_day(monkeypatch):
+    """Tests that perc_complete is reused within a day, and recomputed on the next"""
+    monkeypatch.setattr(src.budget, "now", lambda: "2021-05-15")
+    period = BudgetPeriod("month", relative_to="2021-01-01")
+    assert period.perc_complete() == 14 / 31
+
+    monkeypatch.setattr(period, "latest", lambda: pytest.fail("perc_complete should be cached"))
+    assert period.perc_complete() == 14 / 31
+
+    monkeypatch.undo()
+    monkeypatch.setattr(src.budget, "now", lambda: "2021-06-02")
+    assert period.perc_complete() == 1 / 30
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    """A small Budget pinned to mid-February of this year (periods default to starting this year)"""
+    year = datetime.now().year
+    monkeypatch.setattr(src.budget, "now", lambda: f"{year}-02-15")
+    monkeypatch.setattr(src.budget, "get_config", lambda: {"settings": {"budget": {
+        "total": 1000,
+        "categories": {"Food": 300, "Travel": 200},
+    }}})
+
+    return Budget(pd.DataFrame({
+        "date": [f"{year}-01-20", f"{year}-02-01", f"{year}-02-03", f"{year}-02-10", f"{year}-02-11"],
+        "month": [f"{year}-01", f"{year}-02", f"{year}-02", f"{year}-02", f"{year}-02"],
+        "category_1": ["Food", "Food", "Travel", "Shops", None],
+        "amount": [50.0, 20.0, 100.0, 30.0, 5.0],
+    }))
+
+
+def test_current_summary(budget):
+    """Tests spending per budget item over the current period, including uncategorized spending"""
+    summary = budget.current_summary()
+    assert summary["Food"]["spending"] == 20.0
+    assert summary["Travel"]["spending"] == 100.0
+    assert summary["overall"]["spending"] == 155.0
+    assert not summary["overall"]["over_budget"]
+
+
+def test_simple_summary(budget):
+    """Tests the per category breakdown of a single period"""
+    year = datetime.now().year
+    summary = budget.simple_summary("month", f"{year}-02").set_index("category")
+    assert summary["spent"].to_dict() == {"Food": 20.0, "Travel": 100.0, "Other": 35.0}
+    assert summary["total_budget"].to_dict() == {"Food": 300, "Travel": 200, "Other": 500}
+
+
+def test_plan_shares_periods(budget):
+    """Tests that budget items with the same period string share one BudgetPeriod"""
+    plan = budget.budget_plan
+    assert plan.category_budgets["Food"].period is plan.category_budgets["Travel"].period
+    assert plan.category_budgets["Food"].period is plan.total_budget_item.period
@@ -0,0 +1,103 @@
+from datetime import date
+
+import pandas as pd
+
+import src.user_modifications
+from src.history import dedup_against, load_history, merge_history, save_history
+from src.user_modifications import transform_pipeline
+
+
+def test_legacy_csv_history_round_trip(tmp_path):
+    """Tests that a CSV seeded history merged with a fresh Plaid batch can be saved & reloaded as parquet"""
+    history_file = str(tmp_path / "app" / "all_transactions.parquet")
+    legacy_csv_file = str(tmp_path / "all_transactions.csv")
+
+    # What the dashboard used to write: everything comes back as strings (or blanks)
+    pd.DataFrame({
+        "date": ["2021-01-01", "2021-01-05", "2021-01-20"],
+        "authorized_date": ["2020-12-31", None, "2021-01-19"],
+        "name": ["Uber", "LYFT", "Old Pending"],
+        "category": ["['Travel', 'Taxi']"] * 3,
+        "amount": [10.5, 20.0, 5.0],
+        "pending": [False, False, True],
+        "transaction_code": [None, None, None],
+    }).to_csv(legacy_csv_file, index=False)
+
+    # A fresh Plaid pull has datetime.date objects, lists and nested values
+    latest_df = pd.DataFrame({
+        "date": [date(2021, 1, 15), date(2021, 1, 25)],
+        "authorized_date": [date(2021, 1, 14), None],
+        "name": ["Uber", "Store"],
+        "category": [["Travel", "Taxi"], ["Shops"]],
+        "amount": [12.25, 30.0],
+        "pending": [False, False],
+        "transaction_code": ["purchase", 5],
+        "location": [{"city": "SF"}, {"city": None}],
+    })
+    latest_df["date"] = pd.to_datetime(latest_df["date"])
+
+    existing_df = load_history(history_file, legacy_csv_file)
+    merged_df = merge_history(existing_df, latest_df, pd.Timestamp("2021-01-10"))
+    save_history(merged_df, history_file)
+
+    saved_df = load_history(history_file, legacy_csv_file)
+    assert saved_df["name"].tolist() == ["Uber", "LYFT", "Uber", "Store"]
+    assert saved_df["date"].tolist() == pd.to_datetime(["2021-01-01", "2021-01-05", "2021-01-15", "2021-01-25"]).tolist()
+    assert pd.api.types.is_datetime64_any_dtype(saved_df["authorized_date"])
+    assert saved_df["authorized_date"].isna().tolist() == [False, True, False, True]
+    assert saved_df["amount"].tolist() == [10.5, 20.0, 12.25, 30.0]
+    assert "location" not in saved_df
+
+    # Saved sorted, so the next merge can slice it straight away
+    assert saved_df["date"].is_monotonic_increasing
+
+
+def test_amount_rules_match_after_round_trip(tmp_path, monkeypatch):
+    """Tests that custom category amount rules still match amounts that have been through the saved history"""
+    history_file = str(tmp_path / "all_transactions.parquet")
+    save_history(pd.DataFrame({
+        "date": pd.to_datetime(["2021-01-01", "2021-01-02", "2021-01-03"]),
+        "name": ["Streaming", "Groceries", "Gym"],
+        "category": [["Service"], ["Shops"], ["Recreation"]],
+        "amount": [12.99, 49.95, 30.0],
+    }), history_file)
+
+    df = load_history(history_file)
+    assert df["amount"].tolist() == [12.99, 49.95, 30.0]
+
+    monkeypatch.setattr(src.user_modifications, "get_config", lambda: {"settings": {
+        "transformations": ["add_cat_1", "add_cat_2"],
+        "remove_transactions": [],
+        "custom_category_map": {"Subs": [12.99, 49.95]},
+    }})
+    df = transform_pipeline(df)
+    assert df["category_1"].tolist() == ["Subs", "Subs", "Recreation"]
+
+
+def test_load_float32_history(tmp_path):
+    """Tests that amounts in histories saved as float32 are restored to their cent values"""
+    history_file = str(tmp_path / "all_transactions.parquet")
+    pd.DataFrame({
+        "date": pd.to_datetime(["2021-01-01", "2021-01-02"]),
+        "amount": pd.Series([12.99, 49.95], dtype="float32"),
+    }).to_parquet(history_file, index=False)
+
+    assert load_history(history_file)["amount"].tolist() == [12.99, 49.95]
+
+
+def test_dedup_against():
+    """Tests that transactions already in the sheet (ISO string dates) are dropped from a Plaid pull (date objects)"""
+    sheet_df = pd.DataFrame({
+        "date": ["2021-01-05", "2021-01-05"],
+        "name": ["Uber", "LYFT"],
+        "amount": [10.5, 20.0],
+    })
+    latest_df = pd.DataFrame({
+        "date": [date(2021, 1, 5), date(2021, 1, 5), date(2021, 1, 5), date(2021, 1, 6)],
+        "name": ["Uber", "LYFT", "LYFT", "Uber"],
+        "amount": [10.5, 20.0, 25.0, 10.5],
+    })
+
+    deduped_df = dedup_against(sheet_df, latest_df)
+    assert deduped_df["name"].tolist() == ["LYFT", "Uber"]
+    assert deduped_df["amount"].tolist() == [25.0, 10.5]
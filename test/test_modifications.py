@@ -1,7 +1,8 @@
 import pandas as pd
 import pytest
 
-from src.user_modifications import update_categories
+import src.user_modifications
+from src.user_modifications import remove_transactions, transform_df_by_funcs, transform_pipeline, update_categories
 
 SIMPLE_DF = pd.DataFrame({
     'category_1': ['Nothing', 'Nothing', 'Nothing', 'Nothing'],
@@ -86,3 +87,66 @@ def test_custom_categories():
         })
     )
     assert df['category_1'].tolist() == ['Uber', 'Nothing', 'Lyft', 'Nothing']
+
+
+def test_transformations():
+    """Tests the month and category columns added by the transformations"""
+    df = transform_df_by_funcs(
+        pd.DataFrame({
+            'date': ['2021-01-15', '2021-02-01', '2021-02-28'],
+            'category': ["['Travel', 'Taxi']", ['Shops'], None],
+        }),
+        tmp_config(transformations=['add_month', 'add_cat_1', 'add_cat_2'])
+    )
+    assert df['month'].tolist() == ['2021-01', '2021-02', '2021-02']
+    assert df['category_1'].tolist() == ['Travel', 'Shops', None]
+    assert df['category_2'].tolist() == ['Taxi', None, None]
+
+
+def test_custom_categories_amounts_and_literals():
+    """Tests amount rules, and that search terms are matched literally rather than as regexes"""
+    df = update_categories(
+        SIMPLE_DF,
+        tmp_config(custom_category_map={
+            'Big': [1000, -5]
+        })
+    )
+    assert df['category_1'].tolist() == ['Big', 'Nothing', 'Nothing', 'Big']
+
+    df = update_categories(
+        SIMPLE_DF,
+        tmp_config(custom_category_map={
+            'Rideshare': ['U.er', 'LY*T']
+        })
+    )
+    assert df['category_1'].tolist() == ['Nothing', 'Nothing', 'Nothing', 'Nothing']
+
+
+def test_remove_transactions():
+    """Tests that transactions containing any of the search terms are removed"""
+    df = remove_transactions(SIMPLE_DF, tmp_config(remove_transactions=['Uber', 'DEPOS']))
+    assert df['name'].tolist() == ['LYFT']
+
+    df = remove_transactions(SIMPLE_DF, tmp_config(remove_transactions=[]))
+    assert df['name'].tolist() == SIMPLE_DF['name'].tolist()
+
+
+def test_transform_pipeline(monkeypatch):
+    """Tests the full pipeline, including removing accounts & transactions before the transformations"""
+    config = tmp_config(
+        transformations=['add_month', 'add_cat_1', 'add_cat_2'],
+        remove_transactions=['DEPOS'],
+        custom_category_map={'Rideshare': ['Uber', 'LYFT']},
+    )
+    config['settings']['remove_account_ids'] = ['savings']
+    monkeypatch.setattr(src.user_modifications, 'get_config', lambda: config)
+
+    df = transform_pipeline(SIMPLE_DF.assign(
+        date=['2021-01-01', '2021-01-02', '2021-02-01', '2021-02-02'],
+        category=["['Travel', 'Taxi']"] * 4,
+        account_id=['checking', 'savings', 'checking', 'checking'],
+    ))
+    assert df['name'].tolist() == ['Uber', 'LYFT']
+    assert df['month'].tolist() == ['2021-01', '2021-02']
+    assert df['category_1'].tolist() == ['Rideshare', 'Rideshare']
+    assert df['category_2'].isna().all()
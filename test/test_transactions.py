@@ -0,0 +1,57 @@
+import json
+import sys
+
+import pytest
+
+pytest.importorskip("plaid")
+
+
+@pytest.fixture
+def transactions_module(tmp_path, monkeypatch):
+    """src.transactions, imported against a throwaway config (it reads the Plaid credentials on import)"""
+    (tmp_path / "config.json").write_text(json.dumps({
+        "client_id": "client_id",
+        "secret": "secret",
+        "access_token": "access_token",
+    }))
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop("src.transactions", None)
+
+    import src.transactions
+    yield src.transactions
+
+    sys.modules.pop("src.transactions", None)
+
+
+class FakeClient:
+    """Serves transactions_get pages from a list, returning short pages at the given offsets"""
+    def __init__(self, transactions, short_pages):
+        self.transactions = transactions
+        self.short_pages = short_pages
+        self.offsets = []
+
+    def transactions_get(self, request):
+        offset, count = request.options.offset, request.options.count
+        self.offsets.append(offset)
+        count = self.short_pages.get(offset, count)
+
+        return {
+            "transactions": self.transactions[offset:offset + count],
+            "total_transactions": len(self.transactions),
+        }
+
+
+def test_get_transactions_fills_short_pages(transactions_module, monkeypatch):
+    """Tests that every transaction is returned, in order, when Plaid returns short pages"""
+    fake_client = FakeClient(list(range(1234)), short_pages={0: 300, 500: 499})
+    monkeypatch.setattr(transactions_module, "client", fake_client)
+
+    assert transactions_module.get_transactions("2021-01-01", "2021-02-01") == list(range(1234))
+    assert sorted(fake_client.offsets) == [0, 300, 500, 999, 1000]
+
+
+def test_get_transactions_no_transactions(transactions_module, monkeypatch):
+    """Tests an empty date range"""
+    monkeypatch.setattr(transactions_module, "client", FakeClient([], short_pages={}))
+
+    assert transactions_module.get_transactions("2021-01-01", "2021-02-01") == []
@@ -0,0 +1,19 @@
+import json
+import os
+
+from src.utils import get_config
+
+
+def test_get_config_follows_file(tmp_path, monkeypatch):
+    """Tests that the config is cached, but re-read once config.json changes"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "config.json").write_text(json.dumps({"settings": {"remove_transactions": ["Uber"]}}))
+    os.utime(tmp_path / "config.json", (1000, 1000))
+
+    config = get_config()
+    assert config["settings"]["remove_transactions"] == ["Uber"]
+    assert get_config() is config
+
+    (tmp_path / "config.json").write_text(json.dumps({"settings": {"remove_transactions": ["LYFT"]}}))
+    os.utime(tmp_path / "config.json", (2000, 2000))
+    assert get_config()["settings"]["remove_transactions"] == ["LYFT"]